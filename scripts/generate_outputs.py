@@ -6,94 +6,211 @@ Deterministic output: outputs/run_{timestamp}_{aoi}/
 
 import sys
 import os
+import argparse
+import multiprocessing
 import json
 import time
+import math
 from datetime import datetime
 from pathlib import Path
+import numpy as np
 import geopandas as gpd
 import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
 
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.core_stack_client import CoreStackClient
+import src.connectivity as connectivity
 from src.connectivity import ConnectivityAnalyzer
 from src.vectorization import raster_to_polygons, merge_and_simplify, export_results
 from src.visualization import plot_connectivity_map
 
-def main():
-    # Configuration
-    STATE = "Jharkhand"
-    DISTRICT = "Ranchi"
-    TEHSIL = "Kanke"
-    YEAR = 2024
+# Tile edge in pixels for the windowed pipeline (multiple of typical 256/512 blocks)
+TILE_SIZE = 1024
+FOREST_CLASSES = [3, 4]
+
+# (state, district, tehsil, year) to process; runs in parallel when > 1
+AOI_LIST = [
+    ("Jharkhand", "Ranchi", "Kanke", 2024),
+]
+
+_client = None
+
+# Tiled, compressed GeoTIFF: 4-class uint8 data compresses well with
+# DEFLATE + horizontal predictor, and 256 px tiles allow partial reads
+RASTER_OPTIONS = dict(
+    tiled=True,
+    blockxsize=256,
+    blockysize=256,
+    compress='DEFLATE',
+    predictor=2,
+    ZLEVEL=6,
+    BIGTIFF='IF_SAFER'
+)
+
+def overview_factors(height, width, min_size=256):
+    """Power-of-two overview levels until the smaller side fits in one tile."""
+    factors = []
+    factor = 2
+    while min(height, width) / factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+def iter_tiles(height, width, tile_size):
+    """Yield non-overlapping windows covering a height x width raster."""
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield Window(col, row, min(tile_size, width - col), min(tile_size, height - row))
+
+def synthetic_lulc_file():
+    """In-memory GeoTIFF with a forest block, used when the API is unreachable."""
+    from rasterio.io import MemoryFile
+    from rasterio.transform import from_origin
+    
+    lulc_array = np.zeros((100, 100), dtype=np.uint8)
+    # Add a forest block
+    lulc_array[30:70, 30:70] = 3 # Core
+    lulc_array[20:80, 45:55] = 4 # Bridge
+    
+    memfile = MemoryFile()
+    with memfile.open(
+        driver='GTiff',
+        height=lulc_array.shape[0],
+        width=lulc_array.shape[1],
+        count=1,
+        dtype=lulc_array.dtype,
+        crs="EPSG:32643",
+        transform=from_origin(350000, 2500000, 30, 30) # UTM-ish
+    ) as tmp:
+        tmp.write(lulc_array, 1)
+    return memfile
+
+def analyze_tiled(src, analyzer, forest_classes, write_tile):
+    """
+    Run mask -> EDT -> classify tile by tile.
+    Each tile is read with a halo of ceil(core_threshold / resolution) pixels,
+    so every pixel closer than core_threshold to non-forest sees its nearest
+    edge and the cropped centre matches a whole-raster run.
+    Only the uint8 class raster is kept in memory; each cropped tile is
+    passed to write_tile(window, classes).
+    """
+    halo = math.ceil(analyzer.core_threshold / analyzer.resolution)
+    bounds = Window(0, 0, src.width, src.height)
+    classes = np.zeros((src.height, src.width), dtype=np.uint8)
+    counts = np.zeros(4, dtype=np.int64)
+    
+    for window in iter_tiles(src.height, src.width, TILE_SIZE):
+        halo_window = Window(
+            window.col_off - halo, window.row_off - halo,
+            window.width + 2 * halo, window.height + 2 * halo
+        ).intersection(bounds)
+        lulc_tile = src.read(1, window=halo_window)
+        forest_mask = analyzer.extract_forest_mask(lulc_tile, forest_classes, reuse_buffer=True)
+        
+        if forest_mask.all():
+            # No edge within the halo: every pixel is at least core_threshold deep
+            tile_classes = np.full(forest_mask.shape, 3, dtype=np.uint8)
+        else:
+            tile_classes, _ = analyzer.analyze(forest_mask)
+        
+        # Crop the halo back off
+        r0 = window.row_off - halo_window.row_off
+        c0 = window.col_off - halo_window.col_off
+        centre = tile_classes[r0:r0 + window.height, c0:c0 + window.width]
+        
+        write_tile(window, centre)
+        classes[window.toslices()] = centre
+        counts += np.bincount(centre.reshape(-1), minlength=4)[:4]
+        
+    return classes, analyzer.statistics_from_counts(counts)
+
+def create_zarr_output(path, height, width, crs, transform):
+    """
+    Chunked Zarr array for batch runs: one Blosc/zstd chunk per tile,
+    written independently with no central IFD to serialize.
+    """
+    import zarr
+    from numcodecs import Blosc
     
+    root = zarr.open(str(path), mode='w')
+    arr = root.create_dataset(
+        'classes',
+        shape=(height, width),
+        chunks=(TILE_SIZE, TILE_SIZE),
+        dtype='u1',
+        compressor=Blosc(cname='zstd', clevel=3, shuffle=Blosc.BITSHUFFLE)
+    )
+    root.attrs['crs'] = crs
+    root.attrs['transform'] = list(transform)[:6]
+    return arr
+
+def _get_client():
+    """One CoreStackClient (and pooled Session) per process, reused across AOIs."""
+    global _client
+    if _client is None:
+        _client = CoreStackClient()
+    return _client
+
+def run_one(state, district, tehsil, year, output_format="geotiff"):
+    """Run the full pipeline for one AOI and return its report."""
     # 1. Setup Output Directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = Path(f"outputs/run_{timestamp}_{TEHSIL}")
+    output_dir = Path(f"outputs/run_{timestamp}_{tehsil}")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    print(f"Starting analysis run for {TEHSIL} ({timestamp})...")
+    print(f"Starting analysis run for {tehsil} ({timestamp})...")
     print(f"Outputs will be saved to: {output_dir}")
     
     # 2. Fetch Data
     print("Fetching LULC data...")
-    client = CoreStackClient()
-    lulc_array = client.fetch_lulc_raster(STATE, DISTRICT, TEHSIL, YEAR)
-    
-    if lulc_array is None:
-        print("Failed to fetch LULC data. Constructing synthetic data for demonstration.")
-        import numpy as np
-        lulc_array = np.zeros((100, 100), dtype=np.uint8)
-        # Add a forest block
-        lulc_array[30:70, 30:70] = 3 # Core
-        lulc_array[20:80, 45:55] = 4 # Bridge
-        
-        # Synthetic transform
-        from rasterio.transform import from_origin
-        transform = from_origin(350000, 2500000, 30, 30) # UTM-ish
-        crs = "EPSG:32643"
-    else:
-        # In real scenario we'd get transform/crs from the fetched raster source
-        # For this script assuming we have them or mocking them if fetch returns raw array
-        # The client.fetch_lulc_raster returns just array in current impl.
-        # We need to improve client to return profile or handle synthetic.
-        print("Warning: Client returned array without profile. Using synthetic georeferencing.")
-        from rasterio.transform import from_origin
-        transform = from_origin(350000, 2500000, 30, 30)
-        crs = "EPSG:32643"
-
-    # 3. Analyze Connectivity
-    print("Running Connectivity Analysis...")
+    client = _get_client()
+    lulc_file = client.fetch_lulc_dataset(state, district, tehsil, year)
     analyzer = ConnectivityAnalyzer(resolution=30)
     
-    # Mask
-    forest_mask = analyzer.extract_forest_mask(lulc_array, [3, 4])
-    
-    # Distance
-    distance_map = analyzer.compute_distance_from_edge(forest_mask)
+    if lulc_file is None:
+        print("Failed to fetch LULC data. Constructing synthetic data for demonstration.")
+        lulc_file = synthetic_lulc_file()
     
-    # Classify
-    connectivity_classes = analyzer.classify_connectivity(distance_map)
+    # 3 + 4. Analyze tile by tile, streaming classes into the output raster
+    print("Running Connectivity Analysis...")
+    with lulc_file, lulc_file.open() as src:
+        transform = src.transform
+        crs = src.crs.to_string()
+        if output_format == "zarr":
+            raster_path = output_dir / "connectivity.zarr"
+            arr = create_zarr_output(raster_path, src.height, src.width, crs, transform)
+            
+            def write_tile(window, data):
+                arr[window.toslices()] = data
+                
+            connectivity_classes, stats = analyze_tiled(src, analyzer, FOREST_CLASSES, write_tile)
+        else:
+            raster_path = output_dir / "connectivity.tif"
+            # Keep the source georeferencing; only dtype/layout change
+            profile = src.profile.copy()
+            profile.pop('photometric', None)
+            profile.update(
+                driver='GTiff',
+                count=1,
+                dtype='uint8',
+                nodata=None,
+                crs=crs,
+                **RASTER_OPTIONS
+            )
+            with rasterio.open(raster_path, 'w', **profile) as dst:
+                
+                def write_tile(window, data):
+                    dst.write(data, 1, window=window)
+                    
+                connectivity_classes, stats = analyze_tiled(src, analyzer, FOREST_CLASSES, write_tile)
+                # Internal overview pyramid so viewers can read a decimated level
+                dst.build_overviews(overview_factors(src.height, src.width), Resampling.nearest)
     
-    # Stats
-    stats = analyzer.calculate_statistics(connectivity_classes)
     print(f"Analysis Complete. Stats: {stats}")
-    
-    # 4. Export Raster
-    print("Exporting Raster...")
-    raster_path = output_dir / "connectivity.tif"
-    with rasterio.open(
-        raster_path, 'w',
-        driver='GTiff',
-        height=connectivity_classes.shape[0],
-        width=connectivity_classes.shape[1],
-        count=1,
-        dtype=connectivity_classes.dtype,
-        crs=crs,
-        transform=transform
-    ) as dst:
-        dst.write(connectivity_classes, 1)
         
     # 5. Vectorize & Export
     print("Vectorizing...")
@@ -113,7 +230,7 @@ def main():
     report = {
         "meta": {
             "timestamp": timestamp,
-            "location": f"{STATE}/{DISTRICT}/{TEHSIL}",
+            "location": f"{state}/{district}/{tehsil}",
             "resolution": 30,
             "crs": crs
         },
@@ -128,11 +245,55 @@ def main():
     with open(report_path, 'w') as f:
         json.dump(report, f, indent=2)
         
-    print("Success! All outputs generated.")
+    print(f"Success! All outputs generated for {tehsil}.")
+    return report
+
+def _init_worker(threads):
+    """Split the cores between pool workers instead of oversubscribing them."""
+    connectivity.EDT_THREADS = threads
+    if connectivity.njit is not None:
+        from numba import config, set_num_threads
+        set_num_threads(min(threads, config.NUMBA_NUM_THREADS))
+
+def main(output_format="geotiff", jobs=None):
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be >= 1, got {jobs}")
+    cpu_count = os.cpu_count() or 1
+    jobs = min(jobs or cpu_count, len(AOI_LIST))
+    if jobs == 1:
+        return [run_one(*aoi, output_format) for aoi in AOI_LIST]
+    
+    # AOIs are independent: one process per AOI keeps cores busy while
+    # another worker is waiting on the API. CUDA contexts do not survive
+    # fork, so GPU runs start fresh interpreters.
+    method = "spawn" if os.environ.get("ANALYZER_DEVICE") == "cuda" else None
+    threads = max(cpu_count // jobs, 1)
+    with multiprocessing.get_context(method).Pool(jobs, _init_worker, (threads,)) as pool:
+        return pool.starmap(run_one, [(*aoi, output_format) for aoi in AOI_LIST])
+
+def _positive_int(value):
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {jobs}")
+    return jobs
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--output-format",
+        choices=["geotiff", "zarr"],
+        default="geotiff",
+        help="Class raster format (zarr for large multi-tile batch runs)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="Worker processes for AOI_LIST (default: CPU count)"
+    )
+    args = parser.parse_args()
     try:
-        main()
+        main(args.output_format, args.jobs)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
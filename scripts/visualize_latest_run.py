@@ -6,8 +6,11 @@ Finds the latest output folder and generates a PNG map of the connectivity.
 import sys
 import os
 import glob
+import math
 from pathlib import Path
 import rasterio
+from rasterio.enums import Resampling
+from rasterio.transform import Affine
 import matplotlib.pyplot as plt
 
 # Add src to path
@@ -15,6 +18,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.visualization import plot_connectivity_map
 
+# Longest side (pixels) of the array passed to the plot
+MAX_PLOT_DIM = 4000
+
 def main():
     # 1. Find latest run
     output_base = Path("outputs")
@@ -28,14 +34,31 @@ def main():
     print(f"Visualizing latest run: {latest_run}")
     
     tif_path = latest_run / "connectivity.tif"
-    if not tif_path.exists():
-        print(f"No connectivity.tif found in {latest_run}")
-        return
-        
+    zarr_path = latest_run / "connectivity.zarr"
+    
     # 2. Load Data
-    with rasterio.open(tif_path) as src:
-        data = src.read(1)
-        transform = src.transform
+    # The map is rendered at 300 dpi anyway, so read a decimated array.
+    if tif_path.exists():
+        # GDAL serves it from the overview pyramid when the file has one.
+        with rasterio.open(tif_path) as src:
+            scale = max(1.0, max(src.height, src.width) / MAX_PLOT_DIM)
+            out_shape = (max(1, int(src.height / scale)), max(1, int(src.width / scale)))
+            data = src.read(1, out_shape=out_shape, resampling=Resampling.nearest)
+            transform = src.transform * src.transform.scale(
+                src.width / out_shape[1], src.height / out_shape[0]
+            )
+    elif zarr_path.exists():
+        # --output-format zarr runs: strided read (nearest) of the chunked
+        # class array; georeferencing is in the group attributes
+        import zarr
+        root = zarr.open(str(zarr_path), mode='r')
+        arr = root['classes']
+        step = max(1, math.ceil(max(arr.shape) / MAX_PLOT_DIM))
+        data = arr[::step, ::step]
+        transform = Affine(*root.attrs['transform']) * Affine.scale(step)
+    else:
+        print(f"No connectivity.tif or connectivity.zarr found in {latest_run}")
+        return
         
     # 3. Plot
     print("Generating map...")
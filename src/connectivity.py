@@ -3,10 +3,256 @@ Forest Connectivity Analysis
 Core algorithms for computing structural connectivity
 """
 
+import os
+import importlib.util
 import numpy as np
-from scipy.ndimage import distance_transform_edt
+from scipy.ndimage import distance_transform_edt, binary_erosion
 from typing import List, Dict, Optional, Tuple
 
+try:
+    import edt
+except ImportError:  # edt is optional, fall back to OpenCV / SciPy
+    edt = None
+
+try:
+    import cv2
+except ImportError:  # OpenCV is optional, fall back to SciPy
+    cv2 = None
+
+try:
+    import cupy as cp
+    from cucim.core.operations.morphology import distance_transform_edt as cucim_distance_transform_edt
+except ImportError:  # GPU stack is optional
+    cp = None
+    cucim_distance_transform_edt = None
+
+try:
+    from numba import njit, prange, get_num_threads
+except ImportError:  # Numba is optional, fall back to NumPy
+    njit = None
+
+# Set ANALYZER_DEVICE=cuda to run the distance transform on the GPU via cuCIM.
+ANALYZER_DEVICE = os.environ.get("ANALYZER_DEVICE", "cpu")
+
+# Preferred distance transform backend ('edt', 'cv2', 'scipy' or
+# 'fastgeodis_cpu'). If it is not installed, the next available one in
+# _EDT_FALLBACK is used.
+EDT_BACKEND = os.environ.get("EDT_BACKEND", "edt")
+_EDT_FALLBACK = ("edt", "cv2", "scipy")
+
+# OpenMP threads for the edt backend (0 = all cores). Lower it when several
+# analyzer processes share the machine, e.g. one per pool worker.
+EDT_THREADS = int(os.environ.get("EDT_THREADS", "0"))
+
+
+def _edt_threads() -> int:
+    return EDT_THREADS or os.cpu_count() or 1
+
+
+def _edt_edt(mask: np.ndarray, sampling: float) -> np.ndarray:
+    # Multi-threaded Felzenszwalb-Huttenlocher EDT; anisotropy gives meters directly
+    return edt.edt(
+        mask,
+        anisotropy=(sampling, sampling),
+        black_border=False,
+        parallel=_edt_threads()
+    )
+
+
+def _edtsq_edt(mask: np.ndarray) -> np.ndarray:
+    # Squared distances in pixels: analyze() compares them against squared
+    # thresholds, so the sqrt pass is never needed
+    return edt.edtsq(mask, black_border=False, parallel=_edt_threads())
+
+
+def _edt_cv2(mask: np.ndarray, sampling: float) -> np.ndarray:
+    # DIST_MASK_PRECISE gives the exact Euclidean transform, same as SciPy
+    mask = np.ascontiguousarray(mask, dtype=np.uint8)
+    return cv2.distanceTransform(mask, cv2.DIST_L2, cv2.DIST_MASK_PRECISE) * sampling
+
+
+def _edt_scipy(mask: np.ndarray, sampling: float) -> np.ndarray:
+    return distance_transform_edt(mask) * sampling
+
+
+def _edt_cucim(mask: np.ndarray, sampling: float) -> np.ndarray:
+    d_mask = cp.asarray(mask)
+    # PBA+ needs explicit block params on large inputs (cuCIM workaround)
+    block_params = (1, 32, 2) if max(mask.shape) > 1024 else None
+    d_dist = cucim_distance_transform_edt(d_mask, block_params=block_params)
+    return cp.asnumpy(d_dist) * sampling
+
+
+def _fastgeodis_available() -> bool:
+    # Checked without importing: torch is slow and heavy to import, and this
+    # backend is opt-in, so only _edt_fastgeodis pays for it
+    return importlib.util.find_spec("FastGeodis") is not None and importlib.util.find_spec("torch") is not None
+
+
+def _edt_fastgeodis(mask: np.ndarray, sampling: float) -> np.ndarray:
+    # Four OpenMP raster-scan passes (lamb=0 -> Euclidean, no image term).
+    # The softmask is 0 at the seeds, i.e. at non-forest pixels. This is an
+    # approximation of the exact EDT; large v marks "no seed reachable".
+    import torch
+    import FastGeodis
+    softmask = torch.from_numpy(np.ascontiguousarray(mask, dtype=np.float32))[None, None]
+    dist = FastGeodis.generalised_geodesic2d(softmask, softmask, 1e10, 0.0, 2)
+    return dist[0, 0].numpy() * sampling
+
+
+_EDT_FUNCS = {
+    "edt": _edt_edt,
+    "cv2": _edt_cv2,
+    "scipy": _edt_scipy,
+    "cucim": _edt_cucim,
+    "fastgeodis_cpu": _edt_fastgeodis
+}
+
+
+def _select_edt_backend(preferred: str, device: str = "cpu") -> str:
+    """Return the first installed backend, starting from `preferred`."""
+    if device == "cuda" and cucim_distance_transform_edt is not None:
+        return "cucim"
+    if preferred not in _EDT_FUNCS:
+        raise ValueError(f"Unknown EDT backend '{preferred}'. Choose from {list(_EDT_FUNCS)}")
+    available = {
+        "edt": edt is not None,
+        "cv2": cv2 is not None,
+        "scipy": True,
+        "cucim": cucim_distance_transform_edt is not None,
+        "fastgeodis_cpu": preferred == "fastgeodis_cpu" and _fastgeodis_available()
+    }
+    for name in (preferred,) + _EDT_FALLBACK:
+        if available[name]:
+            return name
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _classify_kernel(dist, edge_t, core_t, out):
+        # Single pass over flat pixels; same threshold ladder as the NumPy path
+        for i in prange(dist.size):
+            d = dist[i]
+            if d >= core_t:
+                out[i] = 3
+            elif d >= edge_t:
+                out[i] = 2
+            elif d > 0:
+                out[i] = 1
+            else:
+                out[i] = 0
+
+    @njit(parallel=True, cache=True)
+    def _classify_count_kernel(dist, edge_t, core_t, out, counts):
+        # Classify and count per class in one pass; each chunk owns a row
+        # of `counts`, which are reduced after the loop.
+        n_chunks = counts.shape[0]
+        chunk = (dist.size + n_chunks - 1) // n_chunks
+        for c in prange(n_chunks):
+            stop = min((c + 1) * chunk, dist.size)
+            for i in range(c * chunk, stop):
+                d = dist[i]
+                if d >= core_t:
+                    cls = 3
+                elif d >= edge_t:
+                    cls = 2
+                elif d > 0:
+                    cls = 1
+                else:
+                    cls = 0
+                out[i] = cls
+                counts[c, cls] += 1
+
+    @njit(cache=True)
+    def _lower_envelope(f, v, z, out):
+        # Felzenszwalb-Huttenlocher 1D squared EDT over one row:
+        # out[q] = min_p (q - p)^2 + f[p], skipping p with f[p] = inf
+        n = f.size
+        k = -1
+        for p in range(n):
+            if f[p] == np.inf:
+                continue
+            if k < 0:
+                k = 0
+                v[0] = p
+                z[0] = -np.inf
+                z[1] = np.inf
+                continue
+            while True:
+                q = v[k]
+                s = ((f[p] + p * p) - (f[q] + q * q)) / (2.0 * (p - q))
+                if s <= z[k]:
+                    k -= 1
+                else:
+                    break
+            k += 1
+            v[k] = p
+            z[k] = s
+            z[k + 1] = np.inf
+        if k < 0:
+            out[:] = np.inf
+            return
+        k = 0
+        for q in range(n):
+            while z[k + 1] < q:
+                k += 1
+            out[q] = (q - v[k]) * (q - v[k]) + f[v[k]]
+
+    @njit(parallel=True, cache=True)
+    def _lulc_classify_kernel(lulc, lut, edge_sq, core_sq, out):
+        # LUT mask -> separable squared EDT -> threshold on d^2 (no sqrt).
+        rows, cols = lulc.shape
+        g = np.empty((rows, cols), dtype=np.float32)
+        block = 256
+        n_blocks = (cols + block - 1) // block
+        
+        # Pass 1: vertical distance to the nearest non-forest pixel, scanning
+        # rows in order inside column blocks to keep memory access contiguous
+        for b in prange(n_blocks):
+            c0 = b * block
+            c1 = min(c0 + block, cols)
+            for j in range(c0, c1):
+                g[0, j] = np.inf if lut[lulc[0, j]] else 0.0
+            for i in range(1, rows):
+                for j in range(c0, c1):
+                    g[i, j] = g[i - 1, j] + 1.0 if lut[lulc[i, j]] else 0.0
+            for i in range(rows - 2, -1, -1):
+                for j in range(c0, c1):
+                    if g[i + 1, j] + 1.0 < g[i, j]:
+                        g[i, j] = g[i + 1, j] + 1.0
+        
+        # Pass 2: per-row lower envelope of parabolas, fused with classification
+        for i in prange(rows):
+            f = np.empty(cols, dtype=np.float64)
+            d2 = np.empty(cols, dtype=np.float64)
+            v = np.empty(cols, dtype=np.int64)
+            z = np.empty(cols + 1, dtype=np.float64)
+            for j in range(cols):
+                f[j] = g[i, j] * g[i, j]
+            _lower_envelope(f, v, z, d2)
+            for j in range(cols):
+                d = d2[j]
+                if d >= core_sq:
+                    out[i, j] = 3
+                elif d >= edge_sq:
+                    out[i, j] = 2
+                elif d > 0:
+                    out[i, j] = 1
+                else:
+                    out[i, j] = 0
+else:
+    _classify_kernel = None
+    _classify_count_kernel = None
+    _lulc_classify_kernel = None
+
+
+def _disk_footprint(radius: float) -> np.ndarray:
+    """Offsets strictly closer than `radius` pixels (Euclidean)."""
+    r = max(int(np.ceil(radius)) - 1, 0)
+    y, x = np.ogrid[-r:r + 1, -r:r + 1]
+    return (x * x + y * y) < radius * radius
+
+
 class ConnectivityAnalyzer:
     """Analyze forest structural connectivity"""
     
@@ -14,22 +260,53 @@ class ConnectivityAnalyzer:
         self, 
         resolution: int = 30,
         core_threshold: float = 300.0,
-        edge_threshold: float = 100.0
+        edge_threshold: float = 100.0,
+        device: Optional[str] = None
     ):
         """
         Args:
             resolution: Pixel size in meters (CoRE Stack = 30m)
             core_threshold: Distance for core forest (meters)
             edge_threshold: Distance for edge forest (meters)
+            device: 'cpu' or 'gpu'/'cuda' (cuCIM distance transform, falls
+                back to CPU without CuPy). Default: ANALYZER_DEVICE
         """
+        if device == "gpu":
+            device = "cuda"
+        if device not in (None, "cpu", "cuda"):
+            raise ValueError(f"Unknown device '{device}'. Choose from ['cpu', 'gpu']")
         self.resolution = resolution
         self.core_threshold = core_threshold
         self.edge_threshold = edge_threshold
+        self.device = device
+        
+        # Thresholds in pixel units: the hot path compares raw EDT output
+        # against these instead of materializing distances in meters
+        self._edge_px = float(self.edge_threshold) / self.resolution
+        self._core_px = float(self.core_threshold) / self.resolution
+        
+        # Reused across calls when processing many AOIs in a batch
+        self._lut_cache = {}
+        self._mask_buf = None
+        
+    def _forest_lut(self, forest_classes: List[int]) -> np.ndarray:
+        """256-entry uint8 lookup table (1=forest), cached per class list."""
+        key = tuple(sorted(forest_classes))
+        lut = self._lut_cache.get(key)
+        if lut is None:
+            lut = np.zeros(256, dtype=np.uint8)
+            # Ids outside 0..255 can never occur in uint8 LULC (this is what
+            # np.isin would give); dropping them also stops negative ids
+            # from wrapping around to the end of the table
+            lut[[c for c in key if 0 <= c <= 255]] = 1
+            self._lut_cache[key] = lut
+        return lut
         
     def extract_forest_mask(
         self,
         lulc_array: np.ndarray,
-        forest_classes: List[int]
+        forest_classes: List[int],
+        reuse_buffer: bool = False
     ) -> np.ndarray:
         """
         Extract forest pixels from LULC.
@@ -37,43 +314,73 @@ class ConnectivityAnalyzer:
         Args:
             lulc_array: 2D array from CoRE Stack
             forest_classes: Which values = forest (e.g., [3, 4])
+            reuse_buffer: Write into a mask buffer owned by the analyzer
+                instead of allocating a new one (uint8 LULC only). The
+                returned array is overwritten by the next such call.
             
         Returns:
             Binary mask (1=forest, 0=other)
         """
+        if lulc_array.dtype == np.uint8:
+            # CoRE Stack LULC is class-coded uint8: one gather through a
+            # 256-entry lookup table gives the uint8 mask directly
+            lut = self._forest_lut(forest_classes)
+            if not reuse_buffer:
+                return lut[lulc_array]
+            # One flat buffer, grown only when a larger tile arrives; smaller
+            # (edge/corner halo) tiles get a contiguous view of its prefix
+            if self._mask_buf is None or self._mask_buf.size < lulc_array.size:
+                self._mask_buf = np.empty(lulc_array.size, dtype=np.uint8)
+            out = self._mask_buf[:lulc_array.size].reshape(lulc_array.shape)
+            return np.take(lut, lulc_array, out=out)
+        
         mask = np.isin(lulc_array, forest_classes).astype(np.uint8)
         return mask
         
     def compute_distance_from_edge(
         self,
-        forest_mask: np.ndarray
+        forest_mask: np.ndarray,
+        units: str = "meters"
     ) -> np.ndarray:
         """
         Calculate distance from forest edge for each pixel.
-        Uses scipy.ndimage.distance_transform_edt
+        Uses the EDT_BACKEND distance transform (edt -> cv2 -> scipy),
+        or cuCIM on the GPU when device='gpu' (or ANALYZER_DEVICE=cuda)
         
         Args:
             forest_mask: Binary forest mask (1=forest, 0=non-forest)
+            units: 'meters' or 'pixels' (skips scaling by resolution)
 
         Returns:
-            Distance in meters
+            Distance in meters or pixels (float32); all inf if there is
+            no non-forest pixel
         """
         # distance_transform_edt calculates distance to the nearest ZERO (background)
         # So we use the forest mask directly: non-forest is 0. 
         # Pixels inside forest (1) will have distance to nearest non-forest (0).
-        distance_pixels = distance_transform_edt(forest_mask)
-        distance_meters = distance_pixels * self.resolution
-        return distance_meters
+        backend = _select_edt_backend(EDT_BACKEND, self.device or ANALYZER_DEVICE)
+        if forest_mask.all():
+            # No non-forest pixel at all: backends disagree here (edt gives
+            # inf, cv2 ~1e19, scipy a finite in-image distance), so define
+            # it as infinitely far from any edge -> all Core
+            return np.full(forest_mask.shape, np.inf, dtype=np.float32)
+        sampling = 1.0 if units == "pixels" else self.resolution
+        distance = _EDT_FUNCS[backend](forest_mask, sampling)
+        # float32 halves memory traffic in the downstream threshold passes
+        return np.asarray(distance, dtype=np.float32)
         
     def classify_connectivity(
         self,
-        distance_array: np.ndarray
+        distance_array: np.ndarray,
+        units: str = "meters"
     ) -> np.ndarray:
         """
         Classify based on distance thresholds.
         
         Args:
             distance_array: Array of distances in meters
+            units: 'pixels' if distance_array came from
+                compute_distance_from_edge(..., units='pixels')
 
         Returns:
             Classification:
@@ -82,6 +389,34 @@ class ConnectivityAnalyzer:
             2 = Edge (edge_threshold to core_threshold)
             3 = Core (> core_threshold)
         """
+        if units == "pixels":
+            return self._classify(distance_array, self._edge_px, self._core_px)
+        return self._classify(distance_array, self.edge_threshold, self.core_threshold)
+
+    def _classify(
+        self,
+        distance_array: np.ndarray,
+        edge_threshold: float,
+        core_threshold: float
+    ) -> np.ndarray:
+        """Threshold ladder shared by classify_connectivity and analyze."""
+        if distance_array.dtype == np.float32:
+            # Avoid promoting the whole comparison to float64
+            edge_threshold = np.float32(edge_threshold)
+            core_threshold = np.float32(core_threshold)
+        
+        if _classify_kernel is not None:
+            # Fused Numba kernel: no boolean temporaries
+            distance_array = np.ascontiguousarray(distance_array)
+            output = np.empty(distance_array.shape, dtype=np.uint8)
+            _classify_kernel(
+                distance_array.reshape(-1),
+                edge_threshold,
+                core_threshold,
+                output.reshape(-1)
+            )
+            return output
+
         output = np.zeros_like(distance_array, dtype=np.uint8)
         
         # Forest pixels have distance > 0
@@ -96,9 +431,9 @@ class ConnectivityAnalyzer:
         # 2 = Edge (edge_threshold to core_threshold)
         # 3 = Core (> core_threshold)
         
-        output[is_forest & (distance_array < self.edge_threshold)] = 1
-        output[(distance_array >= self.edge_threshold) & (distance_array < self.core_threshold)] = 2
-        output[distance_array >= self.core_threshold] = 3
+        output[is_forest & (distance_array < edge_threshold)] = 1
+        output[(distance_array >= edge_threshold) & (distance_array < core_threshold)] = 2
+        output[distance_array >= core_threshold] = 3
         
         return output
         
@@ -112,15 +447,30 @@ class ConnectivityAnalyzer:
         Args:
             connectivity_array: Classified array (0, 1, 2, 3)
 
+        Returns:
+            Dictionary with area stats in hectares and indices
+        """
+        # Single pass over the uint8 classes instead of one mask per class
+        counts = np.bincount(np.asarray(connectivity_array).reshape(-1), minlength=4)
+        return self.statistics_from_counts(counts)
+
+    def statistics_from_counts(
+        self,
+        counts
+    ) -> Dict[str, float]:
+        """
+        Calculate area statistics from per-class pixel counts.
+        
+        Args:
+            counts: Pixel counts indexed by class (0, Fragmented, Edge, Core)
+
         Returns:
             Dictionary with area stats in hectares and indices
         """
         # Pixel area in hectares
         pixel_area_ha = (self.resolution ** 2) / 10000.0
         
-        fragmented_pixels = np.sum(connectivity_array == 1)
-        edge_pixels = np.sum(connectivity_array == 2)
-        core_pixels = np.sum(connectivity_array == 3)
+        fragmented_pixels, edge_pixels, core_pixels = counts[1], counts[2], counts[3]
         total_forest_pixels = fragmented_pixels + edge_pixels + core_pixels
         
         stats = {
@@ -140,6 +490,135 @@ class ConnectivityAnalyzer:
              
         return stats
 
+    def core_mask(
+        self,
+        forest_mask: np.ndarray
+    ) -> np.ndarray:
+        """
+        Core forest (distance >= core_threshold) without a distance transform.
+        A pixel is core iff no non-forest pixel lies closer than
+        core_threshold, i.e. binary erosion by a disk of that radius.
+        
+        Args:
+            forest_mask: Binary forest mask (1=forest, 0=non-forest)
+
+        Returns:
+            Boolean core mask
+        """
+        return self._erode(forest_mask, self._core_px)
+
+    def classify_by_erosion(
+        self,
+        forest_mask: np.ndarray
+    ) -> np.ndarray:
+        """
+        Same classes as classify_connectivity(compute_distance_from_edge(mask)),
+        built from two integer erosions (edge and core radius) instead of a
+        float distance map.
+        
+        Args:
+            forest_mask: Binary forest mask (1=forest, 0=non-forest)
+
+        Returns:
+            Classification (0, 1, 2, 3)
+        """
+        forest = forest_mask.astype(bool)
+        output = forest.astype(np.uint8)
+        output += self._erode(forest, self._edge_px)
+        output += self._erode(forest, self._core_px)
+        return output
+
+    def _erode(self, forest_mask: np.ndarray, radius_px: float) -> np.ndarray:
+        # border_value=1: outside the raster is not an edge, as in the EDT
+        return binary_erosion(
+            forest_mask,
+            structure=_disk_footprint(radius_px),
+            border_value=1
+        )
+
+    def analyze(
+        self,
+        forest_mask: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, float]]:
+        """
+        Distance, classification and statistics in one pass.
+        Thresholds are converted to pixel units up front, so no distance
+        map in meters is ever allocated.
+        
+        Args:
+            forest_mask: Binary forest mask (1=forest, 0=non-forest)
+
+        Returns:
+            (connectivity classes, statistics dict)
+        """
+        edge_px = np.float32(self._edge_px)
+        core_px = np.float32(self._core_px)
+        
+        if forest_mask.all():
+            classes = np.full(forest_mask.shape, 3, dtype=np.uint8)
+            return classes, self.calculate_statistics(classes)
+        
+        if _select_edt_backend(EDT_BACKEND, self.device or ANALYZER_DEVICE) == "edt":
+            # d >= t <=> d^2 >= t^2 for non-negative distances
+            distance_pixels = np.asarray(_edtsq_edt(forest_mask), dtype=np.float32)
+            edge_px = np.float32(self._edge_px ** 2)
+            core_px = np.float32(self._core_px ** 2)
+        else:
+            distance_pixels = self.compute_distance_from_edge(forest_mask, units="pixels")
+        
+        if _classify_count_kernel is None:
+            classes = self._classify(distance_pixels, edge_px, core_px)
+            return classes, self.calculate_statistics(classes)
+        
+        distance_pixels = np.ascontiguousarray(distance_pixels)
+        classes = np.empty(distance_pixels.shape, dtype=np.uint8)
+        counts = np.zeros((get_num_threads(), 4), dtype=np.int64)
+        _classify_count_kernel(
+            distance_pixels.reshape(-1),
+            edge_px,
+            core_px,
+            classes.reshape(-1),
+            counts
+        )
+        return classes, self.statistics_from_counts(counts.sum(axis=0))
+
+    def classify_from_lulc(
+        self,
+        lulc_array: np.ndarray,
+        forest_classes: List[int]
+    ) -> np.ndarray:
+        """
+        LULC -> connectivity classes in a single compiled pass.
+        Fuses the forest LUT, a separable squared EDT and the threshold
+        ladder (compared on squared pixel distances), so neither the mask
+        nor a distance map in meters is materialized.
+        
+        Args:
+            lulc_array: 2D uint8 array from CoRE Stack
+            forest_classes: Which values = forest (e.g., [3, 4])
+
+        Returns:
+            Classification (0, 1, 2, 3)
+        """
+        on_gpu = (self.device or ANALYZER_DEVICE) == "cuda" and cucim_distance_transform_edt is not None
+        if _lulc_classify_kernel is None or lulc_array.dtype != np.uint8 or on_gpu:
+            forest_mask = self.extract_forest_mask(lulc_array, forest_classes)
+            return self.classify_connectivity(
+                self.compute_distance_from_edge(forest_mask, units="pixels"),
+                units="pixels"
+            )
+        
+        lulc_array = np.ascontiguousarray(lulc_array)
+        output = np.empty(lulc_array.shape, dtype=np.uint8)
+        _lulc_classify_kernel(
+            lulc_array,
+            self._forest_lut(forest_classes),
+            self._edge_px ** 2,
+            self._core_px ** 2,
+            output
+        )
+        return output
+
 if __name__ == "__main__":
     # Simple verification with synthetic data
     print("Verifying ConnectivityAnalyzer logic...")
@@ -6,12 +6,20 @@ Handles authentication and data fetching from CoRE Stack APIs
 import os
 import requests
 import rasterio
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
 import geopandas as gpd
-from io import BytesIO
-from typing import Dict, List, Optional, Union
+from rasterio.errors import RasterioIOError
+from rasterio.io import MemoryFile
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to response.json()
+    orjson = None
+
 load_dotenv()
 
 class CoreStackClient:
@@ -34,6 +42,19 @@ class CoreStackClient:
             "Content-Type": "application/json"
         }
         
+        # One pooled session: TLS connections are reused across calls,
+        # transient gateway errors are retried with backoff
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
     def get_available_locations(self) -> Dict:
         """
         Get list of states/districts/tehsils with data.
@@ -44,7 +65,7 @@ class CoreStackClient:
         """
         endpoint = f"{self.base_url}/v1/locations/active"
         try:
-            response = requests.get(endpoint, headers=self.headers)
+            response = self.session.get(endpoint)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -57,7 +78,7 @@ class CoreStackClient:
         district: str, 
         tehsil: str, 
         year: int
-    ) -> Union[np.ndarray, None]:
+    ) -> Optional[Tuple[np.ndarray, Dict]]:
         """
         Download LULC raster for location.
         
@@ -68,24 +89,63 @@ class CoreStackClient:
             year: Year of data
             
         Returns:
-            numpy array with LULC classifications or None if failed
+            (LULC array, rasterio profile with transform/crs) or None if failed
+        """
+        memfile = self.fetch_lulc_dataset(state, district, tehsil, year)
+        if memfile is None:
+            return None
+        
+        try:
+            with memfile, memfile.open() as src:
+                return src.read(1), src.profile.copy() # First band + georeferencing
+        except Exception as e:
+            print(f"Error reading raster data: {e}")
+            return None
+
+    def fetch_lulc_dataset(
+        self, 
+        state: str, 
+        district: str, 
+        tehsil: str, 
+        year: int
+    ) -> Optional[MemoryFile]:
+        """
+        Download LULC GeoTIFF without decoding the band.
+        Lets callers read windows tile-by-tile instead of the full raster.
+        
+        Args:
+            state: State name
+            district: District name
+            tehsil: Tehsil name
+            year: Year of data
+            
+        Returns:
+            rasterio MemoryFile (use `.open()` for a DatasetReader) or None if failed
         """
         endpoint = f"{self.base_url}/v1/lulc/{state}/{district}/{tehsil}"
         params = {"year": year}
         
+        memfile = MemoryFile()
         try:
-            # Note: In a real scenario, this might return a URL to a TIFF or binary content.
-            # Assuming binary GeoTIFF content for this implementation as per typical patterns.
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
+            # Stream straight into GDAL's in-memory filesystem: no second full
+            # copy of the GeoTIFF bytes next to the socket buffer
+            with self.session.get(endpoint, params=params, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    memfile.write(chunk)
+            
+            # Fail here, not in the caller, if the body is not a raster
+            # (e.g. an HTML error page served with status 200)
+            with memfile.open():
+                pass
+            return memfile
             
-            with rasterio.open(BytesIO(response.content)) as src:
-                return src.read(1) # Read first band
-                
         except requests.exceptions.RequestException as e:
+            memfile.close()
             print(f"Error fetching LULC data: {e}")
             return None
-        except Exception as e:
+        except RasterioIOError as e:
+            memfile.close()
             print(f"Error reading raster data: {e}")
             return None
 
@@ -109,11 +169,14 @@ class CoreStackClient:
         endpoint = f"{self.base_url}/v1/boundaries/mws/{state}/{district}/{tehsil}"
         
         try:
-            response = requests.get(endpoint, headers=self.headers)
+            response = self.session.get(endpoint)
             response.raise_for_status()
             
-            # Assuming API returns GeoJSON
-            return gpd.read_file(BytesIO(response.content))
+            # Assuming API returns GeoJSON: build directly from the features
+            # instead of dispatching through an OGR driver
+            payload = orjson.loads(response.content) if orjson is not None else response.json()
+            crs = payload.get("crs", {}).get("properties", {}).get("name", "EPSG:4326")
+            return gpd.GeoDataFrame.from_features(payload["features"], crs=crs)
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching micro-watersheds: {e}")
@@ -132,7 +195,7 @@ class CoreStackClient:
         # Try API endpoint if available
         try:
             endpoint = f"{self.base_url}/v1/lulc/metadata"
-            response = requests.get(endpoint, headers=self.headers, timeout=10)
+            response = self.session.get(endpoint, timeout=10)
             if response.status_code == 200:
                 return response.json()
         except Exception:
@@ -3,12 +3,33 @@ GEE Adapter: forest-connectivity-analysis
 Implements strict parity with local Python algorithms using Google Earth Engine.
 
 Parity Guarantees:
-- Distance: `fastDistanceTransform` (matches scipy.ndimage.distance_transform_edt)
+- Distance: `fastDistanceTransform` (matches scipy.ndimage.distance_transform_edt
+  up to ceil(core/resolution)+1 pixels; saturated beyond, where it is Core anyway)
 - Classification: Identical thresholds (Core > 300m, Edge < 300m)
 - Vectorization: scale=30, labelProperty='class_id'
 """
 
+import math
+
 import ee
+from typing import Optional
+
+# Up to this many pixels of core_threshold, two focal-min erosions are
+# cheaper in GEE than a distance transform
+_EROSION_MAX_PX = 16
+
+def _disk_kernel(radius: float) -> ee.Kernel:
+    """
+    Fixed kernel of the offsets strictly closer than `radius` pixels, the
+    same footprint as src.connectivity._disk_footprint: forest survives
+    the erosion exactly where the EDT distance is >= radius.
+    """
+    r = max(int(math.ceil(radius)) - 1, 0)
+    weights = [
+        [1 if x * x + y * y < radius * radius else 0 for x in range(-r, r + 1)]
+        for y in range(-r, r + 1)
+    ]
+    return ee.Kernel.fixed(2 * r + 1, 2 * r + 1, weights, r, r, False)
 
 class GeeConnectivityAnalyzer:
     """
@@ -24,12 +45,16 @@ class GeeConnectivityAnalyzer:
         self.resolution = resolution
         self.core_threshold = core_threshold
         self.edge_threshold = edge_threshold
+        # Distances beyond core_threshold all classify as Core, so the DT
+        # only has to search this far (GEE's DT cost grows with neighborhood^2)
+        self._neigh = int(math.ceil(self.core_threshold / self.resolution)) + 1
 
     def compute_connectivity(
         self, 
         image: ee.Image, 
         aoi: ee.Geometry, 
-        forest_class_ids: list = [3, 4]
+        forest_class_ids: list = [3, 4],
+        include_distance: bool = True
     ) -> ee.Image:
         """
         Compute connectivity classes from LULC image.
@@ -38,6 +63,10 @@ class GeeConnectivityAnalyzer:
             image: LULC raster (e.g., from CoRE Stack assets)
             aoi: Region of Interest
             forest_class_ids: List of values representing forest
+            include_distance: Add the 'distance_m' band. When False and
+                core_threshold is at most 16 pixels, classes come from two
+                disk erosions of the forest mask instead of a distance
+                transform (same classes, no distance band).
             
         Returns:
             ee.Image with bands: ['distance', 'class_id']
@@ -51,6 +80,14 @@ class GeeConnectivityAnalyzer:
             0
         ).rename('forest_mask')
         
+        if not include_distance and self.core_threshold / self.resolution <= _EROSION_MAX_PX:
+            # Forest at distance >= t survives erosion by the disk of radius t;
+            # mask + both erosions gives 0/1/2/3 directly
+            eroded_edge = forest_mask.focalMin(kernel=_disk_kernel(self.edge_threshold / self.resolution))
+            eroded_core = forest_mask.focalMin(kernel=_disk_kernel(self.core_threshold / self.resolution))
+            class_id = forest_mask.add(eroded_edge).add(eroded_core).byte().rename('class_id')
+            return image.addBands(class_id.updateMask(class_id.gt(0)))
+        
         # 2. Compute Distance to Edge
         # Invert mask: we want distance to NEAREST NON-FOREST (0)
         # fastDistanceTransform computes distance to nearest value != 0
@@ -63,11 +100,13 @@ class GeeConnectivityAnalyzer:
         # fastDistanceTransform results in pixels? No, units: 'pixels' (default) or 'meters'?
         # Docs: "The output is the distance in pixels."
         # We need to convert to meters.
+        # Pixels with no non-forest pixel inside the neighborhood come back
+        # masked; saturate them at the neighborhood radius (always >= core)
         distance_px = inverse_mask.fastDistanceTransform(
-            neighborhood=256, # Sufficiently large kernel
+            neighborhood=self._neigh,
             units='pixels',
             metric='squared_euclidean'
-        ).sqrt()
+        ).unmask(self._neigh ** 2).sqrt()
         
         distance_m = distance_px.multiply(self.resolution).rename('distance_m')
 
@@ -80,60 +119,79 @@ class GeeConnectivityAnalyzer:
         # 2 = Edge (edge_threshold to core_threshold)
         # 3 = Core (>= core_threshold)
         
-        class_id = ee.Image(0).byte().rename('class_id')
-        
-        is_forest = forest_mask.eq(1)
-        
-        # Logic:
-        # If forest AND dist < edge -> 1
-        # If forest AND dist >= edge AND dist < core -> 2
-        # If forest AND dist >= core -> 3
-        
-        class_id = class_id.where(is_forest.And(distance_m.lt(self.edge_threshold)), 1)
-        class_id = class_id.where(is_forest.And(distance_m.gte(self.edge_threshold)).And(distance_m.lt(self.core_threshold)), 2)
-        class_id = class_id.where(is_forest.And(distance_m.gte(self.core_threshold)), 3)
+        # One fused expression node instead of chained .where() calls;
+        # thresholds are inlined as constants
+        class_id = distance_m.expression(
+            '(m == 0) ? 0 : (d < {e}) ? 1 : (d < {c}) ? 2 : 3'.format(
+                e=float(self.edge_threshold), c=float(self.core_threshold)
+            ),
+            {'m': forest_mask, 'd': distance_m}
+        ).byte().rename('class_id')
         
         # Mask 0 values for cleaner outputs/vectorization
         class_id = class_id.updateMask(class_id.gt(0))
         
+        if not include_distance:
+            return image.addBands(class_id)
         return image.addBands([distance_m, class_id])
 
     def vectorize_results(
         self, 
         connectivity_image: ee.Image, 
-        aoi: ee.Geometry
+        aoi: ee.Geometry,
+        tile_size_m: Optional[float] = None
     ) -> ee.FeatureCollection:
         """
         Convert connectivity class raster to polygons.
         Using explicit parameters for parity.
+        
+        Args:
+            connectivity_image: Output of compute_connectivity
+            aoi: Region of Interest
+            tile_size_m: If set (e.g. 25000), run reduceToVectors per cell of
+                an AOI covering grid and flatten, so each task stays within
+                GEE memory limits. Patches crossing cell edges come back
+                split. To stitch them, reproject the export to a metric
+                CRS (exports default to EPSG:4326, and the tolerance is
+                in CRS units) and run merge_and_simplify on it; features
+                carry a 'class' property for that.
         """
         # Extract only the class_id band
         classes = connectivity_image.select('class_id')
         
-        vectors = classes.reduceToVectors(
-            geometry=aoi,
-            scale=self.resolution,
-            geometryType='polygon',
-            labelProperty='class_id',
-            eightConnected=True, # Standard for patch analysis
-            bestEffort=False,
-            maxPixels=1e13,
-            tileScale=4 # Improves stability for large areas
-        )
+        def to_vectors(geometry):
+            return classes.reduceToVectors(
+                geometry=geometry,
+                scale=self.resolution,
+                geometryType='polygon',
+                labelProperty='class_id',
+                eightConnected=True, # Standard for patch analysis
+                bestEffort=False,
+                maxPixels=1e13,
+                tileScale=4 # Improves stability for large areas
+            )
+            
+        if tile_size_m is None:
+            vectors = to_vectors(aoi)
+        else:
+            grid = aoi.coveringGrid('EPSG:4326', tile_size_m)
+            vectors = grid.map(
+                lambda cell: to_vectors(cell.geometry().intersection(aoi, ee.ErrorMargin(1)))
+            ).flatten()
         
         # Add Area and Class Name
+        # One server-side dictionary lookup instead of nested ee.Algorithms.If
+        name_map = ee.Dictionary({'1': 'Fragmented', '2': 'Edge', '3': 'Core'})
+        
         def add_attributes(feature):
-            class_id = feature.get('class_id')
-            area_m2 = feature.geometry().area()
-            area_ha = area_m2.divide(10000)
+            class_id = ee.Number(feature.get('class_id')).format('%d')
+            area_ha = feature.geometry().area().divide(10000)
             
-            # Map names using server-side logic if needed, or client side assumes IDs
-            # Simple ee.Algorithms.If is verbose, usually simpler to stick to IDs in GEE attributes
             return feature.set({
+                # Same attribute name as the local raster_to_polygons output
+                'class': feature.get('class_id'),
                 'area_ha': area_ha,
-                'class_name': ee.Algorithms.If(ee.Number(class_id).eq(1), 'Fragmented',
-                               ee.Algorithms.If(ee.Number(class_id).eq(2), 'Edge',
-                               ee.Algorithms.If(ee.Number(class_id).eq(3), 'Core', 'Unknown')))
+                'class_name': name_map.get(class_id, 'Unknown')
             })
             
         return vectors.map(add_attributes)
@@ -3,33 +3,97 @@ Vectorization Module
 Converts connectivity raster to vector polygons
 """
 
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
 import rasterio
 import geopandas as gpd
-from shapely.geometry import shape, MultiPolygon
+import shapely
+from shapely.geometry import MultiPolygon
 from shapely.ops import unary_union
 from rasterio.features import shapes
+from rasterio.transform import Affine
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from typing import Optional, Dict
 
-def raster_to_polygons(
-    connectivity_raster: np.ndarray,
-    transform: rasterio.Affine,
-    crs: str
-) -> gpd.GeoDataFrame:
+try:
+    from pyogrio import write_dataframe
+except ImportError:  # pyogrio is optional, fall back to GeoDataFrame.to_file (Fiona)
+    write_dataframe = None
+
+try:
+    import contourrs
+except ImportError:  # contourrs is optional
+    contourrs = None
+
+def _class_names(values) -> pd.Categorical:
     """
-    Convert connectivity raster to vector polygons.
+    Class ids -> names as a categorical: one relabel of the three
+    categories instead of a dict lookup per row.
+    """
+    return pd.Categorical(np.asarray(values), categories=[1, 2, 3]).rename_categories(
+        ['Fragmented', 'Edge', 'Core']
+    )
+
+def _polygons_from_shapes(results):
+    """
+    Build Shapely polygons from rasterio.features.shapes output in bulk.
+    Coordinates are gathered into flat arrays and passed to the vectorized
+    shapely.linearrings / shapely.polygons constructors (rings grouped by
+    index, first ring = shell), instead of one shape() call per feature.
     
-    Args:
-        connectivity_raster: Classification array (0, 1, 2, 3)
-        transform: Raster geotransform
-        crs: Coordinate reference system string (e.g., 'EPSG:32643')
+    Returns:
+        (array of Polygons, uint8 array of class values)
+    """
+    coords = []
+    ring_sizes = []
+    rings_per_polygon = []
+    values = []
+    
+    for geom, val in results:
+        rings = geom['coordinates']
+        for ring in rings:
+            coords.extend(ring)
+            ring_sizes.append(len(ring))
+        rings_per_polygon.append(len(rings))
+        values.append(val)
         
+    values = np.asarray(values, dtype=np.uint8)
+    if not values.size:
+        return np.empty(0, dtype=object), values
+        
+    ring_index = np.repeat(np.arange(len(ring_sizes)), ring_sizes)
+    rings = shapely.linearrings(np.asarray(coords, dtype=float), indices=ring_index)
+    polygon_index = np.repeat(np.arange(len(rings_per_polygon)), rings_per_polygon)
+    return shapely.polygons(rings, indices=polygon_index), values
+
+def _polygonize(connectivity_raster, transform, backend):
+    """
+    Polygonize one array with the selected backend.
+    
     Returns:
-        GeoDataFrame with polygons and attributes
+        (array of Polygons, uint8 array of class values)
     """
     # Create a mask for valid data (exclude 0 = non-forest)
     mask = connectivity_raster > 0
     
+    if backend == 'contourrs' and contourrs is not None:
+        # Arrow table of (WKB geometry, value); the transform is applied
+        # in Rust, so the geometries are already in CRS coordinates
+        table = contourrs.shapes_arrow(
+            connectivity_raster,
+            mask=mask,
+            connectivity=4, # Same patches as rasterio's default
+            transform=transform
+        )
+        geoms = shapely.from_wkb(table.column('geometry').to_numpy(zero_copy_only=False))
+        values = table.column('value').to_numpy().astype(np.uint8)
+        return geoms, values
+        
     # Extract shapes
     # shapes() returns an iterator of (geometry, value)
     results = shapes(
@@ -38,25 +102,154 @@ def raster_to_polygons(
         transform=transform
     )
     
-    geoms = []
-    values = []
+    return _polygons_from_shapes(results)
+
+def _polygonize_tile(args):
+    """
+    Worker: polygonize one tile in pixel coordinates of the full raster.
+    Integer pixel coordinates keep shared tile edges bit-identical, so
+    the stitching step can match them exactly.
+    """
+    tile, row_off, col_off, backend = args
+    return _polygonize(tile, Affine.translation(col_off, row_off), backend)
+
+def _union_touching(geoms, values, candidates=None):
+    """
+    Union same-class polygons that touch each other.
     
-    for geom, val in results:
-        geoms.append(shape(geom))
-        values.append(int(val))
+    An STRtree finds touching pairs, scipy connected components groups
+    them, and each group is unioned and exploded back to single polygons.
+    Only polygons flagged in `candidates` (default: all) take part.
+    
+    Returns:
+        (array of Polygons, uint8 array of class values)
+    """
+    if candidates is None:
+        candidates = np.ones(len(geoms), dtype=bool)
+    idx = np.flatnonzero(candidates)
+    if not idx.size:
+        return geoms, values
+        
+    subset = geoms[idx]
+    left, right = shapely.STRtree(subset).query(subset, predicate='intersects')
+    same = (left < right) & (values[idx][left] == values[idx][right])
+    graph = coo_matrix(
+        (np.ones(same.sum(), dtype=np.uint8), (left[same], right[same])),
+        shape=(idx.size, idx.size)
+    )
+    _, labels = connected_components(graph, directed=False)
+    
+    merged = []
+    merged_values = []
+    for group in np.split(np.argsort(labels, kind='stable'), np.cumsum(np.bincount(labels))[:-1]):
+        if group.size == 1:
+            merged.append(subset[group[0]])
+        else:
+            merged.append(shapely.union_all(subset[group]))
+        merged_values.append(values[idx][group[0]])
+        
+    parts, part_index = shapely.get_parts(np.asarray(merged, dtype=object), return_index=True)
+    keep = np.flatnonzero(~candidates)
+    return (
+        np.concatenate([geoms[keep], parts]),
+        np.concatenate([values[keep], np.asarray(merged_values, dtype=np.uint8)[part_index]])
+    )
+
+def _polygonize_tiled(connectivity_raster, transform, backend, tile_size, max_workers):
+    """
+    Polygonize tile_size x tile_size tiles in worker processes, then stitch
+    polygons cut by interior tile edges back together.
+    """
+    height, width = connectivity_raster.shape
+    tasks = [
+        (connectivity_raster[r:r + tile_size, c:c + tile_size], r, c, backend)
+        for r in range(0, height, tile_size)
+        for c in range(0, width, tile_size)
+    ]
+    
+    # spawn, not fork: forking after the numba/OpenMP thread pool has started
+    # leaves the interpreter unable to exit
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        results = list(executor.map(_polygonize_tile, tasks))
+        
+    geoms = np.concatenate([g for g, _ in results])
+    values = np.concatenate([v for _, v in results])
+    if not len(geoms):
+        return geoms, values
         
-    if not geoms:
+    # Only polygons whose bbox reaches an interior tile edge can be merged
+    bounds = shapely.bounds(geoms)
+    xs = np.arange(tile_size, width, tile_size)
+    ys = np.arange(tile_size, height, tile_size)
+    on_edge = (
+        np.isin(bounds[:, 0], xs) | np.isin(bounds[:, 2], xs) |
+        np.isin(bounds[:, 1], ys) | np.isin(bounds[:, 3], ys)
+    )
+    geoms, values = _union_touching(geoms, values, on_edge)
+    
+    # Pixel coordinates -> CRS coordinates
+    a, b, c, d, e, f = transform[:6]
+    geoms = shapely.transform(
+        geoms,
+        lambda xy: np.column_stack([
+            a * xy[:, 0] + b * xy[:, 1] + c,
+            d * xy[:, 0] + e * xy[:, 1] + f
+        ])
+    )
+    return geoms, values
+
+def raster_to_polygons(
+    connectivity_raster: np.ndarray,
+    transform: rasterio.Affine,
+    crs: str,
+    backend: str = 'rasterio',
+    tile_size: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> gpd.GeoDataFrame:
+    """
+    Convert connectivity raster to vector polygons.
+    
+    Args:
+        connectivity_raster: Classification array (0, 1, 2, 3)
+        transform: Raster geotransform
+        crs: Coordinate reference system string (e.g., 'EPSG:32643')
+        backend: 'rasterio' (GDAL polygonize) or 'contourrs' (Rust
+            polygonizer, WKB output). Falls back to rasterio when
+            contourrs is not installed.
+        tile_size: If set and the raster is larger, polygonize
+            tile_size x tile_size tiles in parallel worker processes
+            (e.g. 2048) and stitch them. Not usable from daemonic
+            multiprocessing workers.
+        max_workers: Worker processes for tiled mode (default: CPU count)
+        
+    Returns:
+        GeoDataFrame with polygons and attributes
+    """
+    if backend not in ('rasterio', 'contourrs'):
+        raise ValueError(f"Unknown polygonize backend: {backend}")
+        
+    if tile_size and max(connectivity_raster.shape) > tile_size:
+        geoms, values = _polygonize_tiled(
+            connectivity_raster, transform, backend, tile_size, max_workers
+        )
+    else:
+        geoms, values = _polygonize(connectivity_raster, transform, backend)
+        
+    if len(geoms) == 0:
         return gpd.GeoDataFrame(columns=['geometry', 'class', 'class_name', 'area_ha'], crs=crs)
         
-    gdf = gpd.GeoDataFrame({'geometry': geoms, 'class': values}, crs=crs)
+    gdf = gpd.GeoDataFrame({'class': values}, geometry=geoms, crs=crs)
     
     # Map class names
-    class_map = {1: 'Fragmented', 2: 'Edge', 3: 'Core'}
-    gdf['class_name'] = gdf['class'].map(class_map)
+    gdf['class_name'] = _class_names(values)
     
     # Calculate area in hectares
-    # Assuming CRS is projected in meters
-    gdf['area_ha'] = gdf.geometry.area / 10000.0
+    # Assuming CRS is projected in meters; float32 keeps ~7 significant
+    # digits, far below the 0.01 ha reporting precision
+    gdf['area_ha'] = (gdf.geometry.area / 10000.0).astype(np.float32)
     
     return gdf
 
@@ -77,28 +270,28 @@ def merge_and_simplify(
     if gdf.empty:
         return gdf
         
-    # Dissolve by class
-    dissolved = gdf.dissolve(by='class', as_index=False)
-    
-    # Re-calculate area after dissolve
-    dissolved['area_ha'] = dissolved.geometry.area / 10000.0
+    # Union only same-class polygons that actually touch (STRtree +
+    # connected components) instead of a global dissolve per class;
+    # the result is already exploded into single patches
+    geoms, values = _union_touching(
+        np.asarray(gdf.geometry.values),
+        gdf['class'].to_numpy(dtype=np.uint8)
+    )
+    order = np.argsort(values, kind='stable')
+    geoms, values = geoms[order], values[order]
     
-    # Use unary_union to handle MultiPolygons cleanly before exploding might be safer,
-    # but dissolve does that.
-    # Now explode back to single polygons if we want distinct patches, 
-    # or keep as MultiPolygons per class. 
-    # Usually for analysis we want distinct patches.
-    exploded = dissolved.explode(index_parts=False).reset_index(drop=True)
+    # Simplify all patches as one coverage so shared class boundaries stay
+    # identical (no slivers/overlaps between neighbours)
+    if hasattr(shapely, 'coverage_simplify'):
+        geoms = shapely.coverage_simplify(geoms, tolerance)
+    else:  # Shapely < 2.1
+        geoms = shapely.simplify(geoms, tolerance, preserve_topology=True)
     
-    # Re-map class names lost during dissolve if not careful, 
-    # actually dissolve keeps the 'by' column. 
-    # We need to restore 'class_name'
-    class_map = {1: 'Fragmented', 2: 'Edge', 3: 'Core'}
-    exploded['class_name'] = exploded['class'].map(class_map)
-    exploded['area_ha'] = exploded.geometry.area / 10000.0
+    exploded = gpd.GeoDataFrame({'class': values}, geometry=geoms, crs=gdf.crs)
     
-    # Simplify
-    exploded['geometry'] = exploded.geometry.simplify(tolerance, preserve_topology=True)
+    # Attributes once, on the final simplified patches
+    exploded['class_name'] = _class_names(exploded['class'])
+    exploded['area_ha'] = (exploded.geometry.area / 10000.0).astype(np.float32)
     
     return exploded
 
@@ -116,7 +309,18 @@ def export_results(
         format: Format driver ('geojson' -> 'GeoJSON', 'shp' -> 'ESRI Shapefile')
     """
     driver = 'GeoJSON' if format.lower() == 'geojson' else 'ESRI Shapefile'
-    gdf.to_file(output_path, driver=driver)
+    # OGR has no categorical field type: write class names as plain strings
+    categorical = gdf.select_dtypes('category').columns
+    if len(categorical):
+        gdf = gdf.astype({col: str for col in categorical})
+    # float32 areas would be written with float32 noise (0.16 -> 0.159999)
+    for col in gdf.select_dtypes('float32').columns:
+        gdf = gdf.assign(**{col: gdf[col].astype(np.float64).round(4)})
+    if write_dataframe is not None:
+        # Vectorized write: one OGR call over WKB arrays, not per feature
+        write_dataframe(gdf, output_path, driver=driver)
+    else:
+        gdf.to_file(output_path, driver=driver)
 
 if __name__ == "__main__":
     print("Verifying vectorization module...")
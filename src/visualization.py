@@ -4,14 +4,27 @@ Create maps and charts for forest connectivity
 """
 
 import matplotlib.pyplot as plt
-from matplotlib.colors import ListedColormap
 from matplotlib import patches
 import rasterio
 import numpy as np
 import geopandas as gpd
+import shapely
 import folium
 from typing import Dict, Tuple
 
+# RGBA lookup table indexed by class, skipping matplotlib's norm/cmap
+# pipeline: 0 = transparent, 1=red, 2=yellow, 3=green
+_CMAP_LUT = np.array([
+    [0xff, 0xff, 0xff, 0x00],
+    [0xff, 0x44, 0x44, 0xff],
+    [0xff, 0xbb, 0x33, 0xff],
+    [0x00, 0xc8, 0x51, 0xff]
+], dtype=np.uint8)
+
+def _conn_rgba(connectivity_array: np.ndarray) -> np.ndarray:
+    """Connectivity classes (0-3) -> (H, W, 4) uint8 RGBA image."""
+    return _CMAP_LUT[connectivity_array]
+
 def plot_connectivity_map(
     connectivity_array: np.ndarray,
     transform: rasterio.Affine,
@@ -23,15 +36,7 @@ def plot_connectivity_map(
     """
     fig, ax = plt.subplots(figsize=(10, 10))
     
-    # Custom colormap
-    # 0 = white/transparent, 1=red, 2=yellow, 3=green
-    colors = ['white', '#ff4444', '#ffbb33', '#00C851']
-    cmap = ListedColormap(colors)
-    
-    # Mask 0 values for better plot
-    masked_array = np.ma.masked_where(connectivity_array == 0, connectivity_array)
-    
-    im = ax.imshow(masked_array, cmap=cmap, vmin=0, vmax=3, interpolation='nearest')
+    ax.imshow(_conn_rgba(connectivity_array), interpolation='nearest')
     
     # Formatting
     ax.set_title(title, fontsize=14)
@@ -63,11 +68,7 @@ def plot_comparison(
     ax1.axis('off')
     
     # Connectivity Plot
-    colors = ['white', '#ff4444', '#ffbb33', '#00C851']
-    cmap = ListedColormap(colors)
-    masked_conn = np.ma.masked_where(connectivity_array == 0, connectivity_array)
-    
-    ax2.imshow(masked_conn, cmap=cmap, vmin=0, vmax=3, interpolation='nearest')
+    ax2.imshow(_conn_rgba(connectivity_array), interpolation='nearest')
     ax2.set_title("Connectivity Classes")
     ax2.axis('off')
     
@@ -84,26 +85,28 @@ def create_interactive_map(
     """
     m = folium.Map(location=[center[0], center[1]], zoom_start=zoom)
     
-    # Function to style features based on class
-    def style_function(feature):
-        cls = feature['properties'].get('class', 0)
-        color = '#000000'
-        if cls == 1: color = '#ff4444' # Fragmented
-        elif cls == 2: color = '#ffbb33' # Edge
-        elif cls == 3: color = '#00C851' # Core
-        
-        return {
-            'fillColor': color,
-            'color': color,
-            'weight': 1,
-            'fillOpacity': 0.6
-        }
+    # Simplify in a metric CRS as one coverage (shared edges stay shared)
+    # to cut the GeoJSON payload, then pre-bake the fill colour per feature
+    gdf = gdf.to_crs(3857)
+    if hasattr(shapely, 'coverage_simplify'):
+        gdf['geometry'] = shapely.coverage_simplify(gdf.geometry.values, 25.0)
+    else:  # Shapely < 2.1
+        gdf['geometry'] = gdf.geometry.simplify(25.0, preserve_topology=True)
+    gdf['__color'] = gdf['class'].map({1: '#ff4444', 2: '#ffbb33', 3: '#00C851'}).fillna('#000000')
+    gdf = gdf.to_crs(4326)
+    # float32 areas would show float32 noise in the tooltip (0.81 -> 0.8100000023)
+    gdf['area_ha'] = gdf['area_ha'].astype(float).round(4)
     
     # Add GeoDataFrame
     folium.GeoJson(
-        gdf,
+        gdf.__geo_interface__,
         name='Forest Connectivity',
-        style_function=style_function,
+        style_function=lambda feature: {
+            'fillColor': feature['properties']['__color'],
+            'color': feature['properties']['__color'],
+            'weight': 1,
+            'fillOpacity': 0.6
+        },
         tooltip=folium.GeoJsonTooltip(
             fields=['class_name', 'area_ha'],
             aliases=['Class:', 'Area (ha):']
@@ -120,20 +123,16 @@ def plot_statistics(stats: Dict) -> plt.Figure:
     fig, ax = plt.subplots(figsize=(8, 5))
     
     categories = ['Core', 'Edge', 'Fragmented']
-    values = [stats.get('core_area_ha', 0), stats.get('edge_area_ha', 0), stats.get('fragmented_area_ha', 0)]
+    heights = np.array([stats.get(k, 0) for k in ('core_area_ha', 'edge_area_ha', 'fragmented_area_ha')])
     colors = ['#00C851', '#ffbb33', '#ff4444']
     
-    bars = ax.bar(categories, values, color=colors)
+    bars = ax.bar(categories, heights, color=colors)
     
     ax.set_ylabel('Area (Hectares)')
     ax.set_title('Forest Connectivity Statistics')
     
     # Label bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{height:.1f}',
-                ha='center', va='bottom')
+    ax.bar_label(bars, fmt='%.1f', padding=2)
                 
     return fig
 
@@ -31,6 +31,48 @@ def test_extract_forest_mask():
     ])
     np.testing.assert_array_equal(mask, expected)
 
+def test_extract_forest_mask_uint8_lut():
+    analyzer = ConnectivityAnalyzer()
+    data = np.array([
+        [1, 2, 3],
+        [4, 5, 0],
+        [3, 3, 255]
+    ], dtype=np.uint8)
+    mask = analyzer.extract_forest_mask(data, [3, 4])
+    assert mask.dtype == np.uint8
+    np.testing.assert_array_equal(mask, np.isin(data, [3, 4]).astype(np.uint8))
+
+def test_extract_forest_mask_reuse_buffer():
+    analyzer = ConnectivityAnalyzer()
+    first = np.array([[3, 1], [4, 2]], dtype=np.uint8)
+    second = np.array([[1, 3], [2, 4]], dtype=np.uint8)
+
+    mask = analyzer.extract_forest_mask(first, [4, 3], reuse_buffer=True)
+    np.testing.assert_array_equal(mask, [[1, 0], [1, 0]])
+    again = analyzer.extract_forest_mask(second, [3, 4], reuse_buffer=True)
+
+    # Same buffer and a single cached LUT for both class orderings
+    assert np.shares_memory(again, mask)
+    np.testing.assert_array_equal(again, [[0, 1], [0, 1]])
+    assert len(analyzer._lut_cache) == 1
+
+    # Smaller (edge/corner) tiles reuse the buffer; only growth reallocates
+    big = analyzer.extract_forest_mask(np.full((4, 3), 3, dtype=np.uint8), [3], reuse_buffer=True)
+    buf = analyzer._mask_buf
+    small = analyzer.extract_forest_mask(np.array([[3, 1, 3]], dtype=np.uint8), [3], reuse_buffer=True)
+    assert analyzer._mask_buf is buf and np.shares_memory(small, big)
+    assert small.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(small, [[1, 0, 1]])
+
+def test_extract_forest_mask_out_of_range_classes():
+    analyzer = ConnectivityAnalyzer()
+    lulc = np.array([[3, 255], [1, 0]], dtype=np.uint8)
+    expected = np.isin(lulc, [3, 300, -1]).astype(np.uint8)
+
+    mask = analyzer.extract_forest_mask(lulc, [3, 300, -1])
+    np.testing.assert_array_equal(mask, expected)
+    np.testing.assert_array_equal(mask, [[1, 0], [0, 0]])
+
 def test_compute_distance_from_edge(analyzer):
     # 5x5 array. Center 3x3 is forest.
     # Resolution = 10m
@@ -56,6 +98,7 @@ def test_compute_distance_from_edge(analyzer):
     assert dists[1, 1] == 10.0
     # Check non-forest
     assert dists[0, 0] == 0.0
+    assert dists.dtype == np.float32
 
 def test_classify_connectivity(analyzer):
     # thresholds: edge=10, core=30
@@ -73,6 +116,41 @@ def test_classify_connectivity(analyzer):
     expected = np.array([0, 1, 2, 3])
     np.testing.assert_array_equal(classes, expected)
 
+def test_classify_connectivity_pixel_units(analyzer):
+    # resolution 10m: edge=1px, core=3px
+    mask = np.zeros((9, 9), dtype=np.uint8)
+    mask[1:8, 1:8] = 1
+
+    dists_px = analyzer.compute_distance_from_edge(mask, units="pixels")
+    np.testing.assert_allclose(dists_px * analyzer.resolution, analyzer.compute_distance_from_edge(mask))
+
+    np.testing.assert_array_equal(
+        analyzer.classify_connectivity(dists_px, units="pixels"),
+        analyzer.classify_connectivity(analyzer.compute_distance_from_edge(mask))
+    )
+
+def test_classify_connectivity_kernel_matches_numpy(analyzer, monkeypatch):
+    pytest.importorskip("numba")
+    import src.connectivity as connectivity
+
+    rng = np.random.default_rng(1)
+    dists = rng.choice([0.0, 5.0, 10.0, 29.9, 30.0, 45.0], size=(40, 50))
+    fused = analyzer.classify_connectivity(dists)
+
+    monkeypatch.setattr(connectivity, "_classify_kernel", None)
+    np.testing.assert_array_equal(fused, analyzer.classify_connectivity(dists))
+
+@pytest.mark.parametrize("resolution", [10, 30])
+def test_classify_by_erosion_matches_distance(resolution):
+    analyzer = ConnectivityAnalyzer(resolution=resolution, core_threshold=300, edge_threshold=100)
+    rng = np.random.default_rng(3)
+    mask = (rng.random((80, 90)) > 0.001).astype(np.uint8)
+
+    expected = analyzer.classify_connectivity(analyzer.compute_distance_from_edge(mask))
+
+    np.testing.assert_array_equal(analyzer.classify_by_erosion(mask), expected)
+    np.testing.assert_array_equal(analyzer.core_mask(mask), expected == 3)
+
 def test_calculate_statistics(analyzer):
     # 2x2 pixels. resolution 10m. Area per pix = 100m2 = 0.01 ha.
     # classes: 3, 3, 2, 1
@@ -86,3 +164,134 @@ def test_calculate_statistics(analyzer):
     assert stats['total_forest_ha'] == 0.04
     # Frag index: 1 - (0.02 / 0.04) = 0.5
     assert stats['fragmentation_index'] == 0.5
+
+@pytest.mark.parametrize("backend", ["edt", "cv2", "scipy", "cucim"])
+def test_compute_distance_backends_match_scipy(analyzer, monkeypatch, backend):
+    # Every backend must reproduce scipy.ndimage.distance_transform_edt
+    if backend != "scipy":
+        pytest.importorskip(backend)
+    from scipy.ndimage import distance_transform_edt
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", backend)
+
+    rng = np.random.default_rng(0)
+    mask = (rng.random((60, 80)) > 0.2).astype(np.uint8)
+
+    dists = analyzer.compute_distance_from_edge(mask)
+    expected = distance_transform_edt(mask) * analyzer.resolution
+    np.testing.assert_allclose(dists, expected, rtol=1e-5)
+
+def test_unknown_edt_backend(analyzer, monkeypatch):
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", "nope")
+    with pytest.raises(ValueError):
+        analyzer.compute_distance_from_edge(np.ones((3, 3), dtype=np.uint8))
+
+def test_cuda_device_falls_back_to_cpu(analyzer, monkeypatch):
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "ANALYZER_DEVICE", "cuda")
+    monkeypatch.setattr(connectivity, "cucim_distance_transform_edt", None)
+
+    mask = np.zeros((5, 5), dtype=np.uint8)
+    mask[1:4, 1:4] = 1
+    dists = analyzer.compute_distance_from_edge(mask)
+    assert dists[2, 2] == 20.0
+
+@pytest.mark.parametrize("use_numba", [True, False])
+def test_analyze_matches_pipeline(analyzer, monkeypatch, use_numba):
+    # Fused analyze() == extract -> distance -> classify -> statistics
+    import src.connectivity as connectivity
+    if use_numba:
+        pytest.importorskip("numba")
+    else:
+        monkeypatch.setattr(connectivity, "_classify_kernel", None)
+        monkeypatch.setattr(connectivity, "_classify_count_kernel", None)
+
+    rng = np.random.default_rng(2)
+    mask = (rng.random((50, 70)) > 0.1).astype(np.uint8)
+
+    classes, stats = analyzer.analyze(mask)
+    expected = analyzer.classify_connectivity(analyzer.compute_distance_from_edge(mask))
+
+    np.testing.assert_array_equal(classes, expected)
+    assert stats == pytest.approx(analyzer.calculate_statistics(expected))
+
+@pytest.mark.parametrize("shape", [(37, 300), (300, 41), (1, 1)])
+def test_classify_from_lulc_matches_pipeline(shape):
+    pytest.importorskip("numba")
+    analyzer = ConnectivityAnalyzer(resolution=30)
+    rng = np.random.default_rng(4)
+    lulc = rng.choice(np.array([1, 3, 4, 6], dtype=np.uint8), size=shape, p=[0.01, 0.6, 0.38, 0.01])
+    lulc[0, 0] = 6
+
+    expected = analyzer.classify_connectivity(
+        analyzer.compute_distance_from_edge(analyzer.extract_forest_mask(lulc, [3, 4]))
+    )
+    np.testing.assert_array_equal(analyzer.classify_from_lulc(lulc, [3, 4]), expected)
+
+def test_gpu_device_option(monkeypatch):
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "cucim_distance_transform_edt", None)
+    gpu = ConnectivityAnalyzer(resolution=10, device="gpu")
+    assert gpu.device == "cuda"
+
+    # Without CuPy/cuCIM the GPU analyzer gives the CPU result, still float32
+    mask = np.zeros((5, 5), dtype=np.uint8)
+    mask[1:4, 1:4] = 1
+    dists = gpu.compute_distance_from_edge(mask)
+    assert dists.dtype == np.float32
+    assert dists[2, 2] == 20.0
+
+    with pytest.raises(ValueError):
+        ConnectivityAnalyzer(device="tpu")
+
+def test_analyze_squared_edt_matches_scipy(analyzer, monkeypatch):
+    # analyze() thresholds edt.edtsq output on squared distances
+    pytest.importorskip("edt")
+    import src.connectivity as connectivity
+
+    rng = np.random.default_rng(3)
+    mask = (rng.random((60, 60)) > 0.05).astype(np.uint8)
+
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", "edt")
+    classes, _ = analyzer.analyze(mask)
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", "scipy")
+    expected, _ = analyzer.analyze(mask)
+
+    np.testing.assert_array_equal(classes, expected)
+
+def test_fastgeodis_backend_approximates_scipy(analyzer, monkeypatch):
+    pytest.importorskip("FastGeodis")
+    from scipy.ndimage import distance_transform_edt
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", "fastgeodis_cpu")
+
+    rng = np.random.default_rng(0)
+    mask = (rng.random((60, 80)) > 0.2).astype(np.uint8)
+
+    # Raster-scan propagation is approximate, not an exact EDT
+    dists = analyzer.compute_distance_from_edge(mask)
+    expected = distance_transform_edt(mask) * analyzer.resolution
+    np.testing.assert_allclose(dists, expected, rtol=0.1, atol=1e-3)
+
+    # Single-row masks keep their 2D shape
+    row = np.array([[0, 1, 1, 1, 0]], dtype=np.uint8)
+    assert analyzer.compute_distance_from_edge(row).shape == (1, 5)
+
+@pytest.mark.parametrize("backend", ["edt", "cv2", "scipy"])
+def test_all_forest_mask_is_core(analyzer, monkeypatch, backend):
+    # No non-forest pixel: same answer from every backend and entry point
+    if backend != "scipy":
+        pytest.importorskip(backend)
+    import src.connectivity as connectivity
+    monkeypatch.setattr(connectivity, "EDT_BACKEND", backend)
+
+    mask = np.ones((40, 40), dtype=np.uint8)
+    dists = analyzer.compute_distance_from_edge(mask)
+    assert dists.dtype == np.float32 and np.isinf(dists).all()
+    assert (analyzer.classify_connectivity(dists) == 3).all()
+
+    classes, stats = analyzer.analyze(mask)
+    assert (classes == 3).all()
+    assert stats['core_area_ha'] == stats['total_forest_ha']
+    assert (analyzer.classify_from_lulc(np.full((40, 40), 3, dtype=np.uint8), [3]) == 3).all()
@@ -1,13 +1,18 @@
+import json
 import pytest
-from unittest.mock import Mock, patch
+import numpy as np
+from unittest.mock import MagicMock, Mock, patch
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
 from src.core_stack_client import CoreStackClient
 
 def test_client_initialization():
     client = CoreStackClient(api_key="test_key_123")
     assert client.api_key == "test_key_123"
     assert "Bearer test_key_123" in client.headers["Authorization"]
+    assert client.session.headers["Authorization"] == client.headers["Authorization"]
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_available_locations(mock_get):
     mock_response = Mock()
     mock_response.status_code = 200
@@ -22,7 +27,61 @@ def test_get_available_locations(mock_get):
     assert "states" in result
     assert "Jharkhand" in result["states"]
     
-@patch('requests.get')
+@patch('requests.Session.get')
+def test_fetch_lulc_raster_returns_profile(mock_get):
+    data = np.array([[3, 4], [1, 6]], dtype=np.uint8)
+    with MemoryFile() as memfile:
+        with memfile.open(driver="GTiff", height=2, width=2, count=1, dtype="uint8",
+                          crs="EPSG:32643", transform=from_origin(350000, 2500000, 30, 30)) as dst:
+            dst.write(data, 1)
+        content = memfile.read()
+
+    mock_response = MagicMock()
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_content.return_value = [content[:100], content[100:]]
+    mock_get.return_value = mock_response
+
+    client = CoreStackClient(api_key="test_key")
+    lulc, profile = client.fetch_lulc_raster("Jharkhand", "Ranchi", "Kanke", 2024)
+
+    np.testing.assert_array_equal(lulc, data)
+    assert profile["crs"].to_epsg() == 32643
+    assert profile["transform"] == from_origin(350000, 2500000, 30, 30)
+
+@patch('requests.Session.get')
+def test_fetch_lulc_dataset_rejects_non_raster_body(mock_get):
+    mock_response = MagicMock()
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_content.return_value = [b"<html>Service unavailable</html>"]
+    mock_get.return_value = mock_response
+
+    client = CoreStackClient(api_key="test_key")
+    assert client.fetch_lulc_dataset("Jharkhand", "Ranchi", "Kanke", 2024) is None
+    assert client.fetch_lulc_raster("Jharkhand", "Ranchi", "Kanke", 2024) is None
+
+@patch('requests.Session.get')
+def test_fetch_micro_watershed_boundaries(mock_get):
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [{
+            "type": "Feature",
+            "properties": {"mws_id": "MWS_1"},
+            "geometry": {"type": "Polygon", "coordinates": [[[85.0, 23.0], [85.1, 23.0], [85.1, 23.1], [85.0, 23.0]]]}
+        }]
+    }
+    mock_response = Mock()
+    mock_response.json.return_value = geojson
+    mock_response.content = json.dumps(geojson).encode()
+    mock_get.return_value = mock_response
+
+    client = CoreStackClient(api_key="test_key")
+    gdf = client.fetch_micro_watershed_boundaries("Jharkhand", "Ranchi", "Bundu")
+
+    assert len(gdf) == 1
+    assert gdf.iloc[0]["mws_id"] == "MWS_1"
+    assert gdf.crs.to_epsg() == 4326
+
+@patch('requests.Session.get')
 def test_get_lulc_metadata_fallback(mock_get):
     # Simulate API failure
     mock_get.side_effect = Exception("Connection Refused")
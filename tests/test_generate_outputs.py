@@ -0,0 +1,113 @@
+"""
+Unit tests for the tiled pipeline in scripts/generate_outputs.py
+"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+import numpy as np
+import rasterio
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
+from src.connectivity import ConnectivityAnalyzer
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "generate_outputs.py"
+spec = importlib.util.spec_from_file_location("generate_outputs", SCRIPT)
+generate_outputs = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_outputs)
+
+FOREST_CLASSES = [3, 4]
+
+def lulc_memfile(lulc_array):
+    memfile = MemoryFile()
+    with memfile.open(
+        driver='GTiff',
+        height=lulc_array.shape[0],
+        width=lulc_array.shape[1],
+        count=1,
+        dtype=lulc_array.dtype,
+        crs="EPSG:32643",
+        transform=from_origin(350000, 2500000, 30, 30)
+    ) as dst:
+        dst.write(lulc_array, 1)
+    return memfile
+
+def random_lulc(rng, shape):
+    # Blobs of forest (3/4) on non-forest (1), plus one solid forest block
+    # larger than a tile so some tiles see no edge within their halo
+    lulc = np.where(rng.random(shape) > 0.15, 3, 1).astype(np.uint8)
+    lulc[rng.random(shape) > 0.9] = 4
+    lulc[:shape[0] // 2, :shape[1] // 2] = 3
+    return lulc
+
+def test_overview_factors():
+    assert generate_outputs.overview_factors(300, 300) == []
+    assert generate_outputs.overview_factors(1024, 2048) == [2, 4]
+
+def test_iter_tiles_covers_raster_once():
+    covered = np.zeros((70, 45), dtype=int)
+    for window in generate_outputs.iter_tiles(70, 45, 32):
+        covered[window.toslices()] += 1
+    assert (covered == 1).all()
+
+@pytest.mark.parametrize("seed, shape, tile_size", [
+    (0, (150, 170), 40),
+    (1, (97, 203), 33),
+    (2, (256, 120), 64)
+])
+def test_analyze_tiled_matches_whole_raster(monkeypatch, seed, shape, tile_size):
+    # Edge/corner tiles (shape not a multiple of tile_size) and all-forest
+    # tiles must crop back to exactly the whole-raster result
+    monkeypatch.setattr(generate_outputs, "TILE_SIZE", tile_size)
+    analyzer = ConnectivityAnalyzer(resolution=30)
+    lulc = random_lulc(np.random.default_rng(seed), shape)
+
+    expected, expected_stats = analyzer.analyze(analyzer.extract_forest_mask(lulc, FOREST_CLASSES))
+
+    written = np.full(shape, 255, dtype=np.uint8)
+
+    def write_tile(window, data):
+        written[window.toslices()] = data
+
+    memfile = lulc_memfile(lulc)
+    with memfile, memfile.open() as src:
+        classes, stats = generate_outputs.analyze_tiled(src, analyzer, FOREST_CLASSES, write_tile)
+
+    np.testing.assert_array_equal(classes, expected)
+    np.testing.assert_array_equal(written, expected)
+    assert stats == pytest.approx(expected_stats)
+
+@pytest.mark.parametrize("output_format", ["geotiff", "zarr"])
+def test_run_one_writes_class_raster(monkeypatch, tmp_path, output_format):
+    if output_format == "zarr":
+        zarr = pytest.importorskip("zarr")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(generate_outputs, "TILE_SIZE", 32)
+
+    class OfflineClient:
+        def fetch_lulc_dataset(self, *args):
+            return None
+
+    monkeypatch.setattr(generate_outputs, "_get_client", OfflineClient)
+
+    report = generate_outputs.run_one("Jharkhand", "Ranchi", "Kanke", 2024, output_format)
+
+    # Synthetic fallback raster, analyzed in one piece for reference
+    memfile = generate_outputs.synthetic_lulc_file()
+    with memfile, memfile.open() as src:
+        lulc = src.read(1)
+        transform = src.transform
+    analyzer = ConnectivityAnalyzer(resolution=30)
+    expected, stats = analyzer.analyze(analyzer.extract_forest_mask(lulc, FOREST_CLASSES))
+    assert report["statistics"] == pytest.approx(stats)
+
+    (run_dir,) = (tmp_path / "outputs").glob("run_*")
+    if output_format == "zarr":
+        root = zarr.open(str(run_dir / "connectivity.zarr"), mode='r')
+        np.testing.assert_array_equal(root['classes'][:], expected)
+        assert tuple(root.attrs['transform']) == tuple(transform)[:6]
+    else:
+        with rasterio.open(run_dir / "connectivity.tif") as dst:
+            np.testing.assert_array_equal(dst.read(1), expected)
+            assert dst.transform == transform
+            assert dst.profile['tiled']
@@ -0,0 +1,22 @@
+"""
+Unit tests for Sample Data
+"""
+import numpy as np
+import rasterio
+from utils.sample_data import generate_sample_lulc
+
+def test_generate_sample_lulc(tmp_path):
+    path = generate_sample_lulc(str(tmp_path / "sample_lulc.tif"), size=(120, 100))
+    
+    with rasterio.open(path) as src:
+        data = src.read(1)
+        assert src.crs.to_epsg() == 32643
+        assert src.profile['tiled']
+        assert src.compression.value == 'DEFLATE'
+        
+    assert data.shape == (120, 100)
+    assert set(np.unique(data)) <= {1, 2, 3, 4}
+    # Seeded generator: same raster every time
+    again = generate_sample_lulc(str(tmp_path / "again.tif"), size=(120, 100))
+    with rasterio.open(again) as src:
+        np.testing.assert_array_equal(src.read(1), data)
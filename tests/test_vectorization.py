@@ -1,12 +1,18 @@
 """
 Unit tests for Vectorization
 """
+import json
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
 import numpy as np
+import pandas as pd
 import rasterio
 from rasterio.transform import from_origin
 import geopandas as gpd
-from src.vectorization import raster_to_polygons, merge_and_simplify
+from src.vectorization import raster_to_polygons, merge_and_simplify, export_results
 
 @pytest.fixture
 def synthetic_raster():
@@ -50,3 +56,100 @@ def test_empty_raster():
     gdf = raster_to_polygons(data, transform, crs="EPSG:32643")
     assert gdf.empty
     assert 'geometry' in gdf.columns
+
+def test_contourrs_backend_matches_rasterio(synthetic_raster):
+    pytest.importorskip("contourrs")
+    data, transform = synthetic_raster
+    data[0, 0] = 1
+    # Diagonal neighbour of the Core block: a separate patch with 4-connectivity
+    data[7, 7] = 3
+    expected = raster_to_polygons(data, transform, crs="EPSG:32643")
+    gdf = raster_to_polygons(data, transform, crs="EPSG:32643", backend='contourrs')
+    
+    assert len(gdf) == len(expected) == 3
+    assert sorted(gdf['class']) == sorted(expected['class'])
+    assert np.isclose(gdf['area_ha'].sum(), expected['area_ha'].sum())
+    assert gdf.total_bounds.tolist() == expected.total_bounds.tolist()
+
+def test_tiled_polygonize_matches_untiled():
+    data = np.zeros((30, 30), dtype=np.uint8)
+    data[2:25, 4:20] = 3
+    data[10:28, 15:29] = 2
+    data[0, 0] = 1
+    transform = from_origin(0, 300, 10, 10)
+    expected = raster_to_polygons(data, transform, crs="EPSG:32643")
+    gdf = raster_to_polygons(data, transform, crs="EPSG:32643", tile_size=8, max_workers=2)
+    
+    # Polygons cut by tile edges are stitched back together
+    assert len(gdf) == len(expected)
+    assert sorted(gdf['area_ha'].round(4)) == sorted(expected['area_ha'].round(4))
+    assert gdf.total_bounds.tolist() == expected.total_bounds.tolist()
+
+def test_tiled_polygonize_exits_after_numba_kernel():
+    # Worker processes must not be forked from a parent whose numba/OpenMP
+    # threads are already running, or the interpreter hangs on exit
+    script = (
+        "import numpy as np\n"
+        "from rasterio.transform import from_origin\n"
+        "from src.connectivity import ConnectivityAnalyzer\n"
+        "from src.vectorization import raster_to_polygons\n"
+        "mask = np.zeros((30, 30), dtype=bool)\n"
+        "mask[2:28, 2:28] = True\n"
+        "classes, _ = ConnectivityAnalyzer(resolution=10).analyze(mask)\n"
+        "raster_to_polygons(classes, from_origin(0, 300, 10, 10), 'EPSG:32643', tile_size=8, max_workers=2)\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        check=True,
+        timeout=120
+    )
+
+def test_merge_and_simplify_keeps_shared_boundaries():
+    data = np.zeros((20, 20), dtype=np.uint8)
+    data[2:18, 2:10] = 3
+    data[2:18, 10:18] = 2
+    data[5:9, 10:12] = 3
+    transform = from_origin(0, 200, 10, 10)
+    gdf = raster_to_polygons(data, transform, crs="EPSG:32643")
+    merged = merge_and_simplify(gdf, tolerance=15.0)
+    
+    assert set(merged['class']) == {2, 3}
+    core = merged[merged['class'] == 3].unary_union
+    edge = merged[merged['class'] == 2].unary_union
+    # Simplified neighbours neither overlap nor leave gaps between them
+    assert np.isclose(core.intersection(edge).area, 0.0)
+    assert np.isclose(core.union(edge).area, gdf.geometry.unary_union.area, rtol=0.05)
+
+def test_class_name_is_categorical(synthetic_raster, tmp_path):
+    data, transform = synthetic_raster
+    data[0, :] = 1
+    gdf = raster_to_polygons(data, transform, crs="EPSG:32643")
+    
+    assert isinstance(gdf['class_name'].dtype, pd.CategoricalDtype)
+    assert gdf['class'].dtype == np.uint8
+    assert gdf['area_ha'].dtype == np.float32
+    assert list(gdf['class_name'].cat.categories) == ['Fragmented', 'Edge', 'Core']
+    assert dict(zip(gdf['class'], gdf['class_name'])) == {1: 'Fragmented', 3: 'Core'}
+    
+    merged = merge_and_simplify(gdf)
+    assert isinstance(merged['class_name'].dtype, pd.CategoricalDtype)
+    
+    out = tmp_path / "classes.geojson"
+    export_results(merged, str(out))
+    features = json.loads(out.read_text())['features']
+    assert {f['properties']['class_name'] for f in features} == {'Fragmented', 'Core'}
+    assert {f['properties']['area_ha'] for f in features} == {0.1, 0.16}
+
+def test_merge_unions_only_touching_polygons():
+    from shapely.geometry import box
+    gdf = gpd.GeoDataFrame(
+        {'class': np.array([3, 3, 3, 2], dtype=np.uint8)},
+        geometry=[box(0, 0, 10, 10), box(10, 0, 20, 10), box(50, 50, 60, 60), box(20, 0, 30, 10)],
+        crs="EPSG:32643"
+    )
+    merged = merge_and_simplify(gdf, tolerance=1.0)
+    
+    # The two touching Core boxes become one patch; the other two stay apart
+    assert sorted(merged['class']) == [2, 3, 3]
+    assert np.allclose(sorted(merged['area_ha']), [0.01, 0.01, 0.02])
@@ -0,0 +1,3 @@
+"""
+Utility helpers (sample data for notebooks and demos)
+"""
@@ -0,0 +1,76 @@
+"""
+Sample Data
+Synthetic CoRE Stack-like LULC raster for offline notebooks and demos
+"""
+
+import os
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from typing import Tuple
+
+def generate_sample_lulc(
+    output_path: str = "data/sample_lulc.tif",
+    size: Tuple[int, int] = (500, 500),
+    n_fragments: int = 20
+) -> str:
+    """
+    Write a synthetic LULC GeoTIFF: a large forest block cut by a corridor,
+    a second forest class patch and scattered small forest fragments.
+    
+    Args:
+        output_path: Destination GeoTIFF
+        size: (rows, cols)
+        n_fragments: Number of scattered circular forest fragments
+        
+    Returns:
+        output_path
+    """
+    rng = np.random.default_rng(42)
+    rows, cols = size
+    
+    # 1 = non-forest background (cropland/built-up)
+    data = np.ones((rows, cols), dtype=np.uint8)
+    
+    # Large forest block (3) cut by a non-forest corridor (road/river)
+    data[rows // 10:rows // 2, cols // 10:cols // 2] = 3
+    data[rows // 4:rows // 4 + 3, :] = 2
+    
+    # Second forest class (4)
+    data[rows // 2:rows * 4 // 5, cols // 2:cols * 9 // 10] = 4
+    
+    # Scattered fragments: squared distances to all centres in one
+    # broadcast pass, reduced over the centres axis
+    y, x = np.ogrid[:rows, :cols]
+    rx = rng.integers(0, cols, n_fragments)
+    ry = rng.integers(0, rows, n_fragments)
+    rr = rng.integers(5, 20, n_fragments)
+    d2 = (x[None, :, :] - rx[:, None, None]) ** 2 + (y[None, :, :] - ry[:, None, None]) ** 2
+    data[(d2 < (rr ** 2)[:, None, None]).any(axis=0)] = 3
+    
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with rasterio.open(
+        output_path,
+        'w',
+        driver='GTiff',
+        height=rows,
+        width=cols,
+        count=1,
+        dtype=data.dtype,
+        crs="EPSG:32643",
+        transform=from_origin(350000, 2500000, 30, 30),
+        # 256 px tiles for windowed/tiled reads; few-class LULC compresses
+        # well with DEFLATE + predictor even at the cheapest level
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        compress='deflate',
+        predictor=2,
+        zlevel=1
+    ) as dst:
+        dst.write(data, 1)
+        
+    return output_path
+
+if __name__ == "__main__":
+    print(f"Sample LULC written to {generate_sample_lulc()}")